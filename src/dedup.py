@@ -0,0 +1,146 @@
+import hashlib, pickle, re, zlib
+from pathlib import Path
+import numpy as np
+
+# Mersenne prime used for the universal hash family h(x) = (a*x + b) mod p
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+WORD_PATTERN = re.compile(r'\w+')
+INDEX_VERSION = 3   # bump when the pickled index layout changes
+
+def shingles(text, k=3):
+    """
+    Word k-shingles of (already cleaned) text, lowercased.
+    Texts shorter than k words yield a single shingle of the whole text.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+class MinHashLSH:
+    """
+    MinHash signatures + banded locality-sensitive hashing for near-duplicate detection.
+    Each indexed document belongs to a cluster keyed by its representative id.
+    Only representatives are stored in the band buckets; candidates sharing a bucket
+    are confirmed by estimated Jaccard, so lookups avoid all-pairs comparison.
+    Member signatures are kept too, so a cluster can be handed to another member
+    when its representative's text changes.
+    The index is pickled between runs so new fetches are matched against old ones.
+    """
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, shingle_size=3, seed=1):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.buckets = [dict() for _ in range(bands)]   # band -> {band hash: [doc ids]}
+        self.signatures = {}                            # doc id -> signature
+        self.cluster_of = {}                            # doc id -> representative id
+        self.text_hash = {}                             # doc id -> hash of indexed text
+        self.version = INDEX_VERSION
+
+    def signature(self, text):
+        sh = shingles(text, self.shingle_size)
+        if not sh:
+            return None
+        hv = np.array([zlib.crc32(s.encode("utf-8")) for s in sh], dtype=np.uint64)
+        # uint64 arithmetic wraps silently; still a valid hash family (as in datasketch)
+        perm = (np.outer(hv, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return perm.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, sig):
+        for i in range(self.bands):
+            yield i, sig[i * self.rows:(i + 1) * self.rows].tobytes()
+
+    def query(self, sig):
+        """Return the representative id of the closest indexed near-duplicate, or None."""
+        candidates = set()
+        for i, key in self._band_keys(sig):
+            candidates.update(self.buckets[i].get(key, ()))
+        best, best_sim = None, self.threshold
+        for cid in candidates:
+            sim = float(np.mean(self.signatures[cid] == sig))
+            if sim >= best_sim:
+                best, best_sim = cid, sim
+        return None if best is None else self.cluster_of[best]
+
+    def _unbucket(self, doc_id):
+        sig = self.signatures.get(doc_id)
+        if sig is None:
+            return
+        for i, key in self._band_keys(sig):
+            ids = self.buckets[i].get(key, [])
+            if doc_id in ids:
+                ids.remove(doc_id)
+
+    def _promote(self, rep):
+        """Hand rep's cluster to its oldest member with a signature; rep is detached."""
+        members = [d for d, r in self.cluster_of.items() if r == rep and d != rep]
+        new_rep = next((d for d in members if d in self.signatures), None)
+        for d in members:
+            self.cluster_of[d] = new_rep if new_rep is not None else d
+        if new_rep is not None:
+            self._index(new_rep, self.signatures[new_rep])
+
+    def add(self, doc_id, text):
+        """
+        Index a document and return the representative id of its cluster.
+        Ids already indexed with the same text are not re-hashed; if the text changed
+        (e.g. articletext arrived on a later fetch) the id is detached and looked up
+        again like a new document. A changed representative first hands its cluster
+        to another member. Empty texts form their own cluster.
+        """
+        h = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if doc_id in self.cluster_of:
+            if self.text_hash.get(doc_id) == h:
+                return self.cluster_of[doc_id]
+            if self.cluster_of[doc_id] == doc_id:
+                self._unbucket(doc_id)
+                self._promote(doc_id)
+            self.signatures.pop(doc_id, None)
+            del self.cluster_of[doc_id]
+        self.text_hash[doc_id] = h
+        sig = self.signature(text)
+        rep = None if sig is None else self.query(sig)
+        if sig is not None:
+            self.signatures[doc_id] = sig
+        if rep is not None:
+            self.cluster_of[doc_id] = rep
+            return rep
+        self.cluster_of[doc_id] = doc_id
+        self._index(doc_id, sig)
+        return doc_id
+
+    def _index(self, doc_id, sig):
+        if sig is None:
+            return
+        self.signatures[doc_id] = sig
+        for i, key in self._band_keys(sig):
+            self.buckets[i].setdefault(key, []).append(doc_id)
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load_or_create(cls, path, **params):
+        """
+        Load a pickled index if it exists and was built with the same parameters
+        and index version, otherwise start an empty one.
+        """
+        path = Path(path)
+        if path.exists():
+            with open(path, 'rb') as f:
+                index = pickle.load(f)
+            if getattr(index, "version", None) == INDEX_VERSION and \
+                    all(getattr(index, k, None) == v for k, v in params.items()):
+                return index
+            print(f"Dedup parameters or index version changed; rebuilding index at {path}")
+        return cls(**params)
@@ -2,7 +2,7 @@ import argparse
 import pandas as pd
 from pathlib import Path
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from emotion_lexicons import load_nrc, aggregate_emotions, compute_hope_proxy, HOPE_CUSTOM
+from emotion_lexicons import load_emotion_matcher, compute_hope_proxy
 from utils import load_config
 from tqdm import tqdm
 import numpy as np
@@ -12,15 +12,21 @@ import seaborn as sns
 def main(cfg_path):
     cfg = load_config(cfg_path)
     df = pd.read_pickle(Path(cfg["processed_dir"]) / "processed.pkl")
-    nrc = load_nrc(cfg["nrc_lexicon_path"])
+    lex_cfg = cfg.get("lexicon", {})
+    matcher = load_emotion_matcher(
+        cfg["nrc_lexicon_path"],
+        phrases_path=lex_cfg.get("phrases_file"),
+        cache_path=lex_cfg.get("cache_path")
+    )
+    negation_window = lex_cfg.get("negation_window", 0)
     analyzer = SentimentIntensityAnalyzer()
 
     # Compute per-document emotion counts + VADER
     emo_rows = []
     for _, row in tqdm(df.iterrows(), total=len(df)):
-        counts = aggregate_emotions(row.tokens, nrc)
-        hope_extra = sum(1 for t in row.tokens if t in HOPE_CUSTOM)
-        hope_proxy = compute_hope_proxy(counts) + hope_extra
+        # NRC words, curated hope terms and multiword phrases in one pass
+        counts = matcher.match(row.tokens, negation_window=negation_window)
+        hope_proxy = compute_hope_proxy(counts) + counts.get("hope", 0)
         vader = analyzer.polarity_scores(row.text)
         emo_rows.append({
             "date": row.date,
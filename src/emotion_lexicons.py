@@ -1,3 +1,6 @@
+from pathlib import Path
+from lexicon_matcher import PhraseMatcher, file_fingerprint, MATCHER_VERSION
+
 def load_nrc(path):
     """
     NRC file format: word<tab>emotion<tab>1/0
@@ -15,6 +18,12 @@ def load_nrc(path):
             emo_map.setdefault(word.lower(), set()).add(emotion)
     return emo_map
 
+NRC_LABELS = {
+    "anger", "anticipation", "disgust", "fear", "joy", "sadness", "surprise", "trust",
+    "positive", "negative"
+}
+PHRASE_LABELS = NRC_LABELS | {"hope"}
+
 HOPE_CUSTOM = {
     # Extend/adjust this curated hope lexicon
     "progress", "solution", "solutions", "opportunity", "opportunities",
@@ -36,4 +45,51 @@ def aggregate_emotions(tokens, nrc_map):
 def compute_hope_proxy(counts):
     # Approximate hope from anticipation + trust + curated positive lexicon occurrences
     hope = counts.get("anticipation", 0) + counts.get("trust", 0)
-    return hope
\ No newline at end of file
+    return hope
+
+def load_phrase_list(path):
+    """
+    User phrase file format: phrase<tab>label[,label...]  ('#' starts a comment)
+    Returns list of (phrase, set(labels)).
+    """
+    phrases = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split('\t')
+            if len(parts) != 2:
+                print(f"Warning: {path}:{lineno}: expected 'phrase<tab>labels', skipping: {line!r}")
+                continue
+            phrase, labels = parts
+            labels = {l.strip() for l in labels.split(',') if l.strip()}
+            unknown = labels - PHRASE_LABELS
+            if unknown:
+                print(f"Warning: {path}:{lineno}: unknown label(s) {sorted(unknown)} ignored")
+                labels -= unknown
+            if labels:
+                phrases.append((phrase.strip().lower(), labels))
+    return phrases
+
+def load_emotion_matcher(nrc_path, phrases_path=None, cache_path=None):
+    """
+    Compile NRC, HOPE_CUSTOM (label 'hope') and optional user phrases into one PhraseMatcher.
+    The compiled matcher is pickled to cache_path and reused until a source file changes.
+    """
+    fingerprint = (MATCHER_VERSION,) + file_fingerprint(nrc_path, phrases_path) + (tuple(sorted(HOPE_CUSTOM)),)
+    if cache_path:
+        matcher = PhraseMatcher.load(cache_path, fingerprint)
+        if matcher is not None:
+            return matcher
+    matcher = PhraseMatcher(fingerprint)
+    for word, emos in load_nrc(nrc_path).items():
+        matcher.add(word, emos)
+    for word in HOPE_CUSTOM:
+        matcher.add(word, {"hope"})
+    if phrases_path and Path(phrases_path).exists():
+        for phrase, labels in load_phrase_list(phrases_path):
+            matcher.add(phrase, labels)
+    if cache_path:
+        matcher.save(cache_path)
+    return matcher
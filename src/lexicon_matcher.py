@@ -0,0 +1,103 @@
+import pickle
+from pathlib import Path
+from collections import Counter
+
+_LABELS = 0   # int key: cannot collide with string tokens in a trie node
+MATCHER_VERSION = 3   # bump when the trie layout or match semantics change
+
+NEGATORS = {
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor",
+    "without", "hardly", "barely", "lack", "fail"
+}
+
+class PhraseMatcher:
+    """
+    Token trie mapping single words and multiword phrases to label sets.
+    Phrases are tuples of lowercase tokens; matching is greedy longest-match,
+    left to right, so a document is scored in one pass over its tokens.
+    A multiword match counts the phrase labels on top of the single-word labels
+    of its constituent tokens, so word-level scores are never lost.
+    """
+    def __init__(self, fingerprint=None):
+        self.root = {}
+        self.max_len = 0
+        self.fingerprint = fingerprint
+
+    def add(self, phrase, labels):
+        if isinstance(phrase, str):
+            phrase = phrase.lower().split()
+        if not phrase:
+            return
+        node = self.root
+        for tok in phrase:
+            node = node.setdefault(tok, {})
+        node.setdefault(_LABELS, set()).update(labels)
+        self.max_len = max(self.max_len, len(phrase))
+
+    def _longest(self, tokens, start):
+        node, labels, end = self.root, None, start
+        for i in range(start, min(len(tokens), start + self.max_len)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if _LABELS in node:
+                labels, end = node[_LABELS], i + 1
+        return labels, end
+
+    def match(self, tokens, negation_window=0, negators=NEGATORS):
+        """
+        Count label occurrences in a token sequence.
+        With negation_window > 0, matches preceded by a negator within that many
+        tokens are skipped. preprocess keeps "not" lemmas (incl. spaCy's "n't")
+        so contractions like "isn't" count as negators.
+        """
+        counts = Counter()
+        last_neg = -1
+        i, n = 0, len(tokens)
+        while i < n:
+            labels, end = self._longest(tokens, i)
+            negated = negation_window and last_neg >= 0 and i - last_neg <= negation_window
+            if labels is None:
+                end = i + 1
+            # Negators anywhere in the span (incl. inside a phrase) affect later matches
+            for j in range(i, end):
+                if tokens[j] in negators:
+                    last_neg = j
+            if labels is None:
+                i = end
+                continue
+            if not negated:
+                for lab in labels:
+                    counts[lab] += 1
+                if end - i > 1:
+                    for tok in tokens[i:end]:
+                        for lab in self.root.get(tok, {}).get(_LABELS, ()):
+                            counts[lab] += 1
+            i = end
+        return counts
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path, fingerprint=None):
+        """Load a pickled matcher; returns None if missing or built from different sources."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            matcher = pickle.load(f)
+        if fingerprint is not None and matcher.fingerprint != fingerprint:
+            return None
+        return matcher
+
+def file_fingerprint(*paths):
+    """(path, mtime, size) for each existing path; used to invalidate cached matchers."""
+    fp = []
+    for p in paths:
+        if p and Path(p).exists():
+            st = Path(p).stat()
+            fp.append((str(p), st.st_mtime_ns, st.st_size))
+    return tuple(fp)
@@ -1,13 +1,16 @@
-import argparse, re
+import argparse, re, time
 from pathlib import Path
 from collections import Counter
 from datetime import datetime
 import spacy
 from tqdm import tqdm
 import pandas as pd
-from utils import load_config, read_jsonl
+from utils import load_config, load_keywords, read_jsonl
+from dedup import MinHashLSH
+from lexicon_matcher import PhraseMatcher
 
 URL_PATTERN = re.compile(r'https?://\S+')
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
 
 def clean_text(text):
     if not text:
@@ -16,6 +19,29 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text).strip()
     return text
 
+def simple_tokens(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def build_relevance_matcher(keywords):
+    # Each keyword (single word or phrase) is its own label so hits can be inspected
+    matcher = PhraseMatcher()
+    for kw in keywords:
+        matcher.add(simple_tokens(kw), {kw})
+    return matcher
+
+def relevance_score(matcher, text):
+    return sum(matcher.match(simple_tokens(text)).values())
+
+def rows_to_frame(rows):
+    if not rows:
+        # Create empty DataFrame with expected schema to avoid downstream errors
+        return pd.DataFrame(columns=[
+            "id","date","period","domain","text","tokens","entities","copy_count","relevance","nlp_path"
+        ])
+    df = pd.DataFrame(rows)
+    df.sort_values("date", inplace=True)
+    return df
+
 def main(cfg_path):
     cfg = load_config(cfg_path)
     nlp = spacy.load("en_core_web_sm", disable=["parser"])
@@ -23,42 +49,120 @@ def main(cfg_path):
     out_dir = Path(cfg["processed_dir"])
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    rows = []
-    for rec in read_jsonl(raw_path):
-        text = rec.get("title", "") + " " + rec.get("seendate", "")
+    # Keyword relevance gate: drop (or route to a cheap path) off-topic docs before spaCy
+    rel_cfg = cfg.get("relevance", {})
+    rel_matcher = build_relevance_matcher(load_keywords(cfg["keywords_file"]))
+    min_score = rel_cfg.get("min_score", 1)
+    rel_mode = rel_cfg.get("mode", "drop")
+    if rel_mode not in ("drop", "cheap"):
+        raise ValueError(f"relevance.mode must be 'drop' or 'cheap', got {rel_mode!r}")
+    n_seen = n_filtered = 0
+
+    # Collapse near-duplicate / syndicated copies before any NLP work
+    dedup_cfg = cfg.get("dedup", {})
+    dedup_params = dict(
+        num_perm=dedup_cfg.get("num_perm", 128),
+        bands=dedup_cfg.get("bands", 16),
+        threshold=dedup_cfg.get("threshold", 0.8),
+        shingle_size=dedup_cfg.get("shingle_size", 3)
+    )
+    index = dropped_index = None
+    if dedup_cfg.get("enabled", True):
+        index_path = dedup_cfg.get("index_path", out_dir / "dedup_index.pkl")
+        index = MinHashLSH.load_or_create(index_path, **dedup_params)
+        # In-memory only: clusters dropped docs for the time-saved estimate
+        # without putting irrelevant articles into the persisted index
+        dropped_index = MinHashLSH(**dedup_params)
+    kept, dropped_keys = [], set()
+    for lineno, rec in enumerate(read_jsonl(raw_path)):
         snippet = rec.get("extras", {}).get("articletext", "") or rec.get("title", "")
         combined = rec.get("title", "") + " " + snippet
         cleaned = clean_text(combined)
         if len(cleaned) < cfg["min_doc_chars"]:
             continue
-        doc = nlp(cleaned)
-        tokens = [t.lemma_.lower() for t in doc if t.is_alpha]
-        ents = [(e.text, e.label_) for e in doc.ents]
+        n_seen += 1
+        # Score raw title + raw article text (not the title-padded fallback)
+        raw_text = rec.get("title", "") + " " + rec.get("extras", {}).get("articletext", "")
+        score = relevance_score(rel_matcher, raw_text)
+        # Records without a URL get a stable per-line id (raw file is append-only)
+        doc_id = rec.get("url", "") or f"line:{lineno}"
+        if score < min_score:
+            n_filtered += 1
+            if rel_mode == "drop":
+                dropped_keys.add(dropped_index.add(doc_id, cleaned) if dropped_index is not None else doc_id)
+                continue
+        if index is not None:
+            index.add(doc_id, cleaned)
+        kept.append((doc_id, rec, cleaned, score))
+
+    # Resolve clusters only after all adds: a changed representative can hand its
+    # cluster to another member part-way through the run
+    def cluster_key(doc_id):
+        return index.cluster_of.get(doc_id, doc_id) if index is not None else doc_id
+    clusters = {}   # representative id -> [first record, cleaned text, set of doc ids, relevance]
+    for doc_id, rec, cleaned, score in kept:
+        key = cluster_key(doc_id)
+        if key not in clusters:
+            clusters[key] = [rec, cleaned, set(), score]
+        clusters[key][2].add(doc_id)
+        # A cluster takes the spaCy path if any of its copies passes the gate
+        clusters[key][3] = max(clusters[key][3], score)
+    if index is not None:
+        index.save(index_path)
+        n_docs = sum(len(ids) for _, _, ids, _ in clusters.values())
+        print(f"Dedup: {n_docs} documents -> {len(clusters)} clusters")
+
+    rows, cheap_rows = [], []
+    nlp_time, n_nlp = 0.0, 0
+    for rec, cleaned, ids, score in tqdm(clusters.values(), total=len(clusters)):
+        if score < min_score:
+            # Cheap path: surface tokens only, no lemmas or entities
+            nlp_path = "cheap"
+            tokens = [t for t in simple_tokens(cleaned) if t.isalpha()]
+            ents = []
+        else:
+            nlp_path = "spacy"
+            t0 = time.perf_counter()
+            doc = nlp(cleaned)
+            nlp_time += time.perf_counter() - t0
+            n_nlp += 1
+            # Keep "n't" (lemma "not") so negation windows see contractions
+            tokens = [t.lemma_.lower() for t in doc if t.is_alpha or t.lemma_.lower() == "not"]
+            ents = [(e.text, e.label_) for e in doc.ents]
         seendate = rec.get("seendate", "")
         try:
             dt = datetime.strptime(seendate, "%Y-%m-%d %H:%M:%S")
         except:
             dt = datetime.utcnow()
-        rows.append({
+        (cheap_rows if nlp_path == "cheap" else rows).append({
             "id": rec.get("url", ""),
             "date": dt,
             "period": rec.get("period", ""),
             "domain": rec.get("domain", ""),
             "text": cleaned,
             "tokens": tokens,
-            "entities": ents
+            "entities": ents,
+            "copy_count": len(ids),
+            "relevance": score,
+            "nlp_path": nlp_path
         })
 
-    df = pd.DataFrame(rows)
-    if not rows:
-        # Create empty DataFrame with expected schema to avoid downstream errors
-        df = pd.DataFrame(columns=[
-            "id","date","period","domain","text","tokens","entities"
-        ])
-    else:
-        df.sort_values("date", inplace=True)
+    # spaCy is run once per cluster, so time saved is estimated per filtered cluster
+    filtered_clusters = len(dropped_keys) + len(cheap_rows)
+    # No spaCy sample (e.g. everything dropped) means no per-doc cost to extrapolate from
+    saved = f"{filtered_clusters * nlp_time / n_nlp:.1f}s" if n_nlp else "n/a"
+    print(f"Relevance gate (min_score={min_score}, mode={rel_mode}): {n_filtered}/{n_seen} documents "
+          f"({filtered_clusters} clusters) filtered; spaCy time {nlp_time:.1f}s, est. saved {saved}")
+
+    df = rows_to_frame(rows)
     df.to_pickle(out_dir / "processed.pkl")
     print(f"Processed documents: {len(df)} -> {out_dir/'processed.pkl'}")
+    if rel_mode == "cheap":
+        # Cheap rows hold surface tokens, not lemmas: kept apart so downstream
+        # stages (LDA, n-grams, lexicons) only ever read spaCy output
+        cheap_df = rows_to_frame(cheap_rows)
+        cheap_df.to_pickle(out_dir / "processed_cheap.pkl")
+        print(f"Cheap-path documents: {len(cheap_df)} -> {out_dir/'processed_cheap.pkl'}")
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()